@@ -1,6 +1,30 @@
 import gdb
 
 
+def line_spec(context, line_no):
+    """
+    Return the GDB location specification for the given line in the
+    $-implementation.adb file.
+
+    :type context: langkit.gdb.context.Context
+    :type line_no: int
+    :rtype: str
+    """
+    return '{}:{}'.format(context.debug_info.filename, line_no)
+
+
+def create_breakpoint(context, line_no, **kwargs):
+    """
+    Create a breakpoint on the given line in the $-implementation.adb file.
+
+    :type context: langkit.gdb.context.Context
+    :type line_no: int
+    :param kwargs: Additional arguments for the gdb.Breakpoint constructor.
+    :rtype: gdb.Breakpoint
+    """
+    return gdb.Breakpoint(line_spec(context, line_no), **kwargs)
+
+
 class BreakpointGroup:
     """
     List of breakpoints to be considered as a single temporary one.
@@ -36,10 +60,7 @@ class _Breakpoint(gdb.Breakpoint):
     """
 
     def __init__(self, context, line_no):
-        super().__init__(
-            '{}:{}'.format(context.debug_info.filename, line_no),
-            internal=True
-        )
+        super().__init__(line_spec(context, line_no), internal=True)
 
     def stop(self):
         return True
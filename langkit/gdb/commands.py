@@ -1,15 +1,21 @@
 from collections import namedtuple
-from functools import partial
-from io import StringIO
+import sys
 
 import gdb
 
+from langkit.gdb.breakpoints import create_breakpoint, line_spec
 from langkit.gdb.control_flow import go_next, go_out, go_step_inside
-from langkit.gdb.debug_info import DSLLocation, ExprStart, Scope
+from langkit.gdb.debug_info import DSLLocation
 from langkit.gdb.utils import expr_repr, name_repr, prop_repr
 from langkit.utils import no_colors
 
 
+Match = namedtuple('Match', 'prop dsl_sloc line_no')
+"""
+Candidate location for a breakpoint on a DSL source location.
+"""
+
+
 class BaseCommand(gdb.Command):
     """
     Factorize common code for our commands.
@@ -86,23 +92,37 @@ class StatePrinter:
         self.with_ellipsis = with_ellipsis
         self.with_locs = with_locs
         self.var_name = var_name
-        self.sio = StringIO()
+
+        self.lines = []
+        """
+        :type: list[str]
+
+        Lines of output for the state printer.
+        """
+
+        self._var_images = {}
+        """
+        Cache for the images of variables in `self.frame`, indexed by variable
+        name. Each variable is read at most once per state printer.
+
+        :type: dict[str, str]
+        """
 
     def _render(self):
         """
         Internal render method for the state printer.
         """
 
-        # We rebind print to print to our StringIO instance for the scope of
-        # this method.
-        prn = partial(print, file=self.sio)
+        # Append output lines to our buffer rather than printing them one by
+        # one.
+        prn = self.lines.append
 
-        def print_binding(print_fn, b):
-            print_fn('{}{} = {}'.format(
+        def binding_image(b):
+            return '{}{} = {}'.format(
                 name_repr(b),
                 self.loc_image(b.gen_name),
-                self.value_image(b.gen_name)
-            ))
+                self.value_image(b.gen_lower_name)
+            )
 
         if self.state is None:
             prn('Selected frame is not in a property.')
@@ -114,7 +134,7 @@ class StatePrinter:
             for scope_state in self.state.scopes:
                 for b in scope_state.bindings:
                     if b.dsl_name == self.var_name:
-                        print_binding(prn, b)
+                        prn(binding_image(b))
                         return
             prn('No binding called {}'.format(self.var_name))
             return
@@ -123,43 +143,45 @@ class StatePrinter:
         if self.state.property.dsl_sloc:
             prn('from {}'.format(self.state.property.dsl_sloc))
 
+        if self.state.property.parse_error:
+            prn('Cannot decode state: invalid debug info for this property'
+                ' ({})'.format(self.state.property.parse_error))
+
         if self.state.in_memoization_lookup:
             prn('About to return a memoized result...')
 
         for scope_state in self.state.scopes:
-            is_first = [True]
-
-            def print_info(strn):
-                if is_first[0]:
-                    prn('')
-                    is_first[0] = False
-                prn(strn)
-
-            for b in scope_state.bindings:
-                print_binding(print_info, b)
+            scope_lines = [binding_image(b) for b in scope_state.bindings]
 
             done_exprs, last_started = scope_state.sorted_expressions()
 
             for e in done_exprs:
-                print_info('{}{} -> {}'.format(
+                scope_lines.append('{}{} -> {}'.format(
                     expr_repr(e),
                     self.loc_image(e.result_var),
-                    self.value_image(e.result_var)
+                    self.value_image(e.result_lower_var)
                 ))
 
             if last_started:
-                print_info('Currently evaluating {}'.format(
+                scope_lines.append('Currently evaluating {}'.format(
                     expr_repr(last_started)
                 ))
                 if last_started.dsl_sloc:
-                    print_info('from {}'.format(last_started.dsl_sloc))
+                    scope_lines.append('from {}'.format(
+                        last_started.dsl_sloc
+                    ))
+
+            # Separate information for each non-empty scope with an empty line
+            if scope_lines:
+                prn('')
+                self.lines.extend(scope_lines)
 
     def run(self):
         """
         Output the state to stdout.
         """
         self._render()
-        print(self.sio.getvalue())
+        sys.stdout.write(self._image() + '\n')
 
     def render(self):
         """
@@ -169,7 +191,15 @@ class StatePrinter:
         """
         with no_colors():
             self._render()
-        return self.sio.getvalue()
+        return self._image()
+
+    def _image(self):
+        """
+        Return the output lines accumulated so far as a single string.
+
+        :rtype: str
+        """
+        return ''.join('{}\n'.format(line) for line in self.lines)
 
     def loc_image(self, var_name):
         """
@@ -183,12 +213,30 @@ class StatePrinter:
     def value_image(self, var_name):
         """
         Return the image of the value contained in the `var_name` variable.
+        `var_name` must be lower-case (see Context.read_var).
 
         :rtype: str
         """
-        # Switching to lower-case is required since GDB ignores case
-        # insentivity for Ada from the Python API.
-        value = str(self.frame.read_var(var_name.lower()))
+        try:
+            value = self._var_images[var_name]
+        except KeyError:
+            gdb_value = self.context.read_var(self.frame, var_name)
+
+            # When displaying an ellipsis, no more than `self.ellipsis_limit`
+            # characters are displayed: do not let GDB format more array
+            # elements than that. Still honor the user's "print elements"
+            # setting if it is lower (None or 0 means unlimited).
+            # Value.format_string is available only starting with GDB 9.
+            if self.with_ellipsis and hasattr(gdb_value, 'format_string'):
+                max_elements = self.ellipsis_limit
+                user_limit = gdb.parameter('print elements')
+                if user_limit:
+                    max_elements = min(max_elements, user_limit)
+                value = gdb_value.format_string(max_elements=max_elements)
+            else:
+                value = str(gdb_value)
+            self._var_images[var_name] = value
+
         if self.with_ellipsis and len(value) > self.ellipsis_limit:
             value = '{}...'.format(value[:self.ellipsis_limit])
         return value
@@ -220,8 +268,12 @@ For instance::
         possible completions. This is case insensitive, for user convenience.
         """
         prefix = word.lower()
-        result = [prop.name for prop in self.context.debug_info.properties
-                  if prop.name.lower().startswith(prefix)]
+        result = [
+            prop.name
+            for lower_name, prop
+            in self.context.debug_info.properties_by_lower_name.items()
+            if lower_name.startswith(prefix)
+        ]
 
         # If the users didn't ask for a special property, don't suggest special
         # properties, as they are usually just noise for them.
@@ -268,12 +320,8 @@ For instance::
         Try to put a breakpoint on a property whose qualified name is
         `qualname`. Display a message for the user if that is not possible.
         """
-        lower_prop = qualname.lower()
-
-        for prop in self.context.debug_info.properties:
-            if prop.name.lower() == lower_prop:
-                break
-        else:
+        prop = self.context.debug_info.get_property_by_lower_name(qualname)
+        if prop is None:
             print('No such property: {}'.format(qualname))
             return
 
@@ -283,8 +331,7 @@ For instance::
 
         # Break on the first line of the property's first inner scope so that
         # we skip the prologue (all variable declarations).
-        return gdb.Breakpoint('{}:{}'.format(self.context.debug_info.filename,
-                                             prop.body_start))
+        return create_breakpoint(self.context, prop.body_start)
 
     def break_on_dsl_sloc(self, dsl_sloc):
         """
@@ -293,20 +340,10 @@ For instance::
         """
         dsl_sloc = DSLLocation.parse(dsl_sloc)
 
-        Match = namedtuple('Match', 'prop dsl_sloc line_no')
-        matches = []
-
-        def process_scope(prop, scope):
-            for e in scope.events:
-                if isinstance(e, Scope):
-                    process_scope(prop, e)
-                elif (isinstance(e, ExprStart)
-                      and e.dsl_sloc
-                      and e.dsl_sloc.matches(dsl_sloc)):
-                    matches.append(Match(prop, e.dsl_sloc, e.line_no))
-
-        for prop in self.context.debug_info.properties:
-            process_scope(prop, prop)
+        matches = [
+            Match(prop, e.dsl_sloc, e.line_no)
+            for prop, e in self.context.debug_info.lookup_expr_starts(dsl_sloc)
+        ]
 
         if not matches:
             print('No match for {}'.format(dsl_sloc))
@@ -327,9 +364,8 @@ For instance::
                     idx_fmt(i).rjust(idx_width),
                     m.prop.name, m.dsl_sloc
                 ))
-                print('{}at {}:{}'.format(' ' * idx_width,
-                                          self.context.debug_info.filename,
-                                          m.line_no))
+                print('{}at {}'.format(' ' * idx_width,
+                                       line_spec(self.context, m.line_no)))
 
             print('Please chose one of the above locations [default=1]:')
             try:
@@ -353,11 +389,9 @@ For instance::
                     ))
                     return
 
-            m = matches[choice]
+            m = matches[choice - 1]
 
-        return gdb.Breakpoint('{}:{}'.format(
-            self.context.debug_info.filename, m.line_no
-        ))
+        return create_breakpoint(self.context, m.line_no)
 
 
 class NextCommand(BaseCommand):
@@ -36,6 +36,30 @@ class Context:
 
         self.entity_struct_names = self._entity_struct_names()
 
+        self._state_cache = {}
+        """
+        Cache for decoded states. Keys are (PC, function name) pairs for the
+        frame to decode and values are the corresponding decoded states (or
+        None if there is no property running in the frame).
+
+        :type: dict[(int, str), State|None]
+        """
+
+        self._symbol_cache = {}
+        """
+        Cache for the symbols of local variables in the generated library.
+        Keys are (block start address, block end address, variable name)
+        triples.
+
+        :type: dict[(int, int, str), gdb.Symbol]
+        """
+
+        # Decoded states are valid only as long as the inferior does not run,
+        # so invalidate the cache as soon as it resumes, stops or exits.
+        gdb.events.cont.connect(self._invalidate_state_cache)
+        gdb.events.stop.connect(self._invalidate_state_cache)
+        gdb.events.exited.connect(self._invalidate_state_cache)
+
         self.reparse_debug_info()
 
     def _entity_struct_names(self):
@@ -52,6 +76,12 @@ class Context:
             '{}__implementation__ast_envs__entity'.format(self.lib_name),
         }
 
+    def _invalidate_state_cache(self, event=None):
+        """
+        Discard all cached decoded states.
+        """
+        self._state_cache.clear()
+
     def decode_state(self, frame=None):
         """
         Shortcut for::
@@ -60,11 +90,50 @@ class Context:
 
         If `frame` is None, use the selected frame.
 
+        Decoded states are cached until the inferior resumes execution.
+
         :rtype: State
         """
         if frame is None:
             frame = gdb.selected_frame()
-        return State.decode(self, frame)
+
+        # Recursive calls can run the same code in different frames, so make
+        # sure the cached state comes from the requested frame.
+        key = (int(frame.pc()), str(frame.function()))
+        try:
+            result = self._state_cache[key]
+        except KeyError:
+            pass
+        else:
+            if result is None or result.frame == frame:
+                return result
+
+        result = State.decode(self, frame)
+        self._state_cache[key] = result
+        return result
+
+    def read_var(self, frame, var_name):
+        """
+        Shortcut for::
+
+            frame.read_var(var_name)
+
+        Symbol lookups for variables are cached so that reading the same
+        variable later only needs to fetch its value.
+
+        :type frame: gdb.Frame
+        :param str var_name: Lower-case name of the variable to read.
+        :rtype: gdb.Value
+        """
+        block = frame.block()
+        key = (block.start, block.end, var_name)
+        sym = self._symbol_cache.get(key)
+        if sym is None or not sym.is_valid():
+            sym, _ = gdb.lookup_symbol(var_name, block)
+            if sym is None:
+                raise ValueError('Variable \'{}\' not found.'.format(var_name))
+            self._symbol_cache[key] = sym
+        return frame.read_var(sym)
 
     @property
     def analysis_prefix(self):
@@ -81,6 +150,8 @@ class Context:
         Reload debug information from the analysis source file.
         """
         self.debug_info = DebugInfo.parse_from_gdb(self)
+        self._invalidate_state_cache()
+        self._symbol_cache.clear()
 
     def implname(self, suffix):
         """
@@ -1,7 +1,7 @@
 import gdb
 
-from langkit.gdb.breakpoints import BreakpointGroup
-from langkit.gdb.debug_info import ExprDone, ExprStart, Property, PropertyCall
+from langkit.gdb.breakpoints import BreakpointGroup, create_breakpoint
+from langkit.gdb.debug_info import ExprStart, Property, PropertyCall
 from langkit.gdb.utils import expr_repr
 
 
@@ -126,7 +126,7 @@ def go_next(context):
     if new_expr and new_expr.is_done:
         print('{} evaluated to {}'.format(
             expr_repr(new_expr),
-            new_expr.read(new_state.frame)
+            new_expr.read(context, new_state.frame)
         ))
 
     # Display the expression of most interest, if any
@@ -146,21 +146,14 @@ def go_out(context):
     if not state:
         print('Selected frame is not in a property.')
 
-    scope_state, current_expr = state.lookup_current_expr()
+    _, current_expr = state.lookup_current_expr()
     if not current_expr:
         print('Not evaluating any expression currently')
         return
 
     # Look for the point in the generated library where its evaluation will be
     # done.
-    until_line_no = None
-    for e in scope_state.scope.events:
-        if isinstance(e, ExprDone) and e.expr_id == current_expr.expr_id:
-            until_line_no = e.line_no
-    if until_line_no is None:
-        print('ERROR: cannot find the end of evaluation for expression {}.'
-              ' Code generation may have a bug.'.format(current_expr))
-        return
+    until_line_no = current_expr.done_event.line_no
 
     # Now go there! When we land in the expected place, also be useful and
     # display the value we got.
@@ -186,8 +179,10 @@ def go_out(context):
         return error('the expression is not evaluated yet')
 
     print('')
-    print('{} evaluated to: {}'.format(expr_repr(current_expr),
-                                       new_expr.read(new_state.frame)))
+    print('{} evaluated to: {}'.format(
+        expr_repr(current_expr),
+        new_expr.read(context, new_state.frame)
+    ))
     if new_current_expr:
         print('')
         print('Now evaluating {}'.format(expr_repr(new_current_expr)))
@@ -200,9 +195,7 @@ def go_step_inside(context):
     """
 
     def continue_until(line_no, hide_output):
-        dest_spec = '{}:{}'.format(context.debug_info.filename,
-                                   line_no)
-        gdb.Breakpoint(dest_spec, internal=True, temporary=True)
+        create_breakpoint(context, line_no, internal=True, temporary=True)
         gdb.execute('continue', to_string=hide_output)
 
     # First, look for a property call in the current execution state
@@ -3,8 +3,10 @@ Data structures for mapping from generated library source lines to the
 properties DSL level.
 """
 
+from functools import lru_cache
 import inspect
 import shlex
+import sys
 from typing import Dict
 
 
@@ -56,6 +58,24 @@ class DebugInfo:
         :type: dict[str, Property]
         """
 
+        self.properties_by_lower_name = {}
+        """
+        Case-insensitive name-based lookup dictionnary for properties. Keys
+        are lower-case property names.
+
+        :type: dict[str, Property]
+        """
+
+        self.expr_starts_by_dsl_line = {}
+        """
+        Mapping from DSL line numbers to all expression starts whose DSL
+        location is on that line, with the property that contains them.
+        Properties are parsed lazily, so expression starts are sorted in the
+        order in which properties were parsed, not in source order.
+
+        :type: dict[int, list[(Property, ExprStart)]]
+        """
+
     @classmethod
     def parse_from_gdb(cls, context):
         """
@@ -117,6 +137,10 @@ class DebugInfo:
         file and fill self according to it. Raise a ParseError if anything goes
         wrong.
 
+        Directives inside properties are only buffered here: they are parsed
+        when the events of the corresponding property are first needed (see
+        Property.events).
+
         :param iter[str] lines: Iterable that yields all the lines to parse.
             This can be any iterator: a read file, a list of strings in memory,
             a custom iterator, ...
@@ -124,127 +148,234 @@ class DebugInfo:
         """
         self.properties = []
         self.properties_dict = {}
-        scope_stack = []
-        expr_stack = []
+        self.properties_by_lower_name = {}
+        self.expr_starts_by_dsl_line = {}
+
+        # Property whose directives are being read, if any, and the number of
+        # scopes that are still open in it (including the property itself).
+        current_prop = None
+        depth = 0
 
         for line_no, line in enumerate(lines, 1):
             line = line.strip()
             if not line.startswith('--#'):
                 continue
             line = line[3:].strip()
-            args = shlex.split(line)
 
-            try:
-                name = args.pop(0)
-            except IndexError:
-                raise ParseError(line_no, 'directive name is missing')
+            # Inside a property, just look at directive names to know where
+            # the property ends and where its body starts.
+            if current_prop is not None:
+                words = line.split(None, 1)
+                directive_cls = (Directive.name_to_cls.get(words[0])
+                                 if words else None)
+                if directive_cls is PropertyStart:
+                    raise ParseError(line_no, 'property-start directive not'
+                                     ' allowed inside another property')
+
+                current_prop._directives.append((line_no, line))
+
+                if directive_cls in (ScopeStart, PropertyCallStart,
+                                     MemoizationLookupDirective):
+                    depth += 1
+                elif directive_cls is End:
+                    depth -= 1
+                    if depth == 0:
+                        current_prop.line_range.last_line = line_no
+                        current_prop = None
+                elif directive_cls is PropertyBodyStart:
+                    current_prop.body_start = line_no
+                continue
 
-            d = Directive.parse(line_no, name, args)
+            d = self._parse_directive(line_no, line)
 
             if d.is_a(PropertyStart):
-                if scope_stack:
-                    raise ParseError(line_no, 'property-start directive not'
-                                     ' allowed inside another property')
                 p = Property(LineRange(d.line_no, None), d.name, d.dsl_sloc,
-                             d.is_dispatcher)
+                             d.is_dispatcher, self)
                 self.properties.append(p)
                 self.properties_dict[p.name] = p
-                scope_stack.append(p)
+                self.properties_by_lower_name[p.name.lower()] = p
+                current_prop = p
+                depth = 1
+            else:
+                # All other directives must appear inside a property: let the
+                # regular processing report the error.
+                self._process_directive(d, [], [])
 
-            elif d.is_a(ScopeStart, PropertyCallStart,
-                        MemoizationLookupDirective):
-                if not scope_stack or not isinstance(scope_stack[-1], Scope):
-                    raise ParseError(
-                        line_no,
-                        '{} directive must occur inside a property or a'
-                        ' property scope'.format(d.directive_name)
-                    )
+        if current_prop is not None:
+            raise ParseError(line_no, 'end of scope expected before end of'
+                                      ' file')
 
-                line_range = LineRange(d.line_no, None)
+    def _parse_property_events(self, prop, directives):
+        """
+        Internal method. Parse the directives that appear inside `prop` and
+        fill its events according to them.
 
-                if d.is_a(MemoizationLookupDirective):
-                    new_scope = MemoizationLookup(line_range)
-                elif d.is_a(PropertyCallStart):
-                    new_scope = PropertyCall(line_range, d.name)
-                else:
-                    assert d.is_a(ScopeStart)
-                    new_scope = Scope(line_range)
-
-                scope_stack.append(new_scope)
-
-            elif d.is_a(End):
-                if not scope_stack:
-                    raise ParseError(line_no, 'no scope to end')
-                ended_scope = scope_stack.pop()
-                ended_scope.line_range.last_line = d.line_no
-                if scope_stack:
-                    scope_stack[-1].events.append(ended_scope)
+        If anything goes wrong, print an error message on standard output and
+        leave `prop` without events, so that it consistently behaves as an
+        empty property. The error message is kept in `prop.parse_error`.
+
+        :param Property prop: Property to process.
+        :param list[(int, str)] directives: Line number and text for all
+            directives that appear inside `prop`, excluding its property-start
+            directive.
+        """
+        scope_stack = [prop]
+        expr_stack = []
+        try:
+            for line_no, line in directives:
+                self._process_directive(self._parse_directive(line_no, line),
+                                        scope_stack, expr_stack)
+        except ParseError as exc:
+            prop.parse_error = str(exc)
+            print('Error while parsing directives in {}:'.format(
+                self.filename
+            ))
+            print(prop.parse_error)
+            print('Ignoring events for property {}'.format(prop.name))
+
+            # Do not keep partial results: remove all events and all entries
+            # for this property in the DSL line index.
+            prop.events = []
+            for line_no, expr_starts in list(
+                self.expr_starts_by_dsl_line.items()
+            ):
+                expr_starts = [(p, e) for p, e in expr_starts if p is not prop]
+                if expr_starts:
+                    self.expr_starts_by_dsl_line[line_no] = expr_starts
                 else:
-                    assert isinstance(ended_scope, Property), (
-                        'Top-level scopes must all be properties'
-                    )
-                    assert not expr_stack, (
-                        'Some expressions are not done when leaving property'
+                    del self.expr_starts_by_dsl_line[line_no]
+
+    def _parse_directive(self, line_no, line):
+        """
+        Internal method. Parse the text of a GDB helpers directive. Raise a
+        ParseError if anything goes wrong.
+
+        :param int line_no: Line number on which this directive appears.
+        :param str line: Directive text, without the leading "--#".
+        :rtype: Directive
+        """
+        args = shlex.split(line)
+
+        try:
+            name = args.pop(0)
+        except IndexError:
+            raise ParseError(line_no, 'directive name is missing')
+
+        return Directive.parse(line_no, name, args)
+
+    def _process_directive(self, d, scope_stack, expr_stack):
+        """
+        Internal method. Update the scope and expression stacks and the
+        events of the scopes they contain according to the `d` directive.
+        Raise a ParseError if anything goes wrong.
+
+        :param Directive d: Directive to process. It cannot be a
+            property-start directive.
+        :param list[Scope|PropertyCall] scope_stack: Stack of currently open
+            scopes.
+        :param list[ExprStart] expr_stack: Stack of expressions that are not
+            done yet.
+        """
+        if d.is_a(ScopeStart, PropertyCallStart,
+                  MemoizationLookupDirective):
+            if not scope_stack or not isinstance(scope_stack[-1], Scope):
+                raise ParseError(
+                    d.line_no,
+                    '{} directive must occur inside a property or a'
+                    ' property scope'.format(d.directive_name)
+                )
+
+            line_range = LineRange(d.line_no, None)
+
+            if d.is_a(MemoizationLookupDirective):
+                new_scope = MemoizationLookup(line_range)
+            elif d.is_a(PropertyCallStart):
+                new_scope = PropertyCall(line_range, d.name)
+            else:
+                assert d.is_a(ScopeStart)
+                new_scope = Scope(line_range)
+
+            scope_stack.append(new_scope)
+
+        elif d.is_a(End):
+            if not scope_stack:
+                raise ParseError(d.line_no, 'no scope to end')
+            ended_scope = scope_stack.pop()
+            ended_scope.line_range.last_line = d.line_no
+            if scope_stack:
+                scope_stack[-1].events.append(ended_scope)
+            else:
+                assert isinstance(ended_scope, Property), (
+                    'Top-level scopes must all be properties'
+                )
+                if expr_stack:
+                    raise ParseError(
+                        d.line_no,
+                        'some expressions are not done when leaving property'
                         ' {}: {}'.format(
                             ended_scope.name,
-                            ', '.join(expr_stack)
+                            ', '.join(str(e) for e in expr_stack)
                         )
                     )
 
-            elif d.is_a(BindDirective):
-                if not scope_stack:
-                    raise ParseError(line_no, 'no scope for binding')
-                scope_stack[-1].events.append(Bind(d.line_no, d.dsl_name,
-                                                   d.gen_name))
-
-            elif d.is_a(ExprStartDirective):
-                if not scope_stack:
-                    raise ParseError(line_no, 'no scope for expression')
-                start_event = ExprStart(d.line_no, d.expr_id, d.expr_repr,
-                                        d.result_var, d.dsl_sloc)
-                scope_stack[-1].events.append(start_event)
-                if expr_stack:
-                    expr_stack[-1].sub_expr_start.append(start_event)
-                expr_stack.append(start_event)
-
-            elif d.is_a(ExprDoneDirective):
-                if not scope_stack:
-                    raise ParseError(line_no, 'no scope for expression')
-                done_event = ExprDone(d.line_no, d.expr_id)
-                start_event = expr_stack.pop()
-                assert start_event.expr_id == done_event.expr_id, (
-                    'Mismatching ExprStart/ExprStop events: {} and {}'.format(
+        elif d.is_a(BindDirective):
+            if not scope_stack:
+                raise ParseError(d.line_no, 'no scope for binding')
+            scope_stack[-1].events.append(Bind(d.line_no, d.dsl_name,
+                                               d.gen_name))
+
+        elif d.is_a(ExprStartDirective):
+            if not scope_stack:
+                raise ParseError(d.line_no, 'no scope for expression')
+            start_event = ExprStart(d.line_no, d.expr_id, d.expr_repr,
+                                    d.result_var, d.dsl_sloc)
+            scope_stack[-1].events.append(start_event)
+            if start_event.dsl_sloc:
+                self.expr_starts_by_dsl_line.setdefault(
+                    start_event.dsl_sloc.line_no, []
+                ).append((scope_stack[0], start_event))
+            if expr_stack:
+                expr_stack[-1].sub_expr_start.append(start_event)
+            expr_stack.append(start_event)
+
+        elif d.is_a(ExprDoneDirective):
+            if not scope_stack:
+                raise ParseError(d.line_no, 'no scope for expression')
+            done_event = ExprDone(d.line_no, d.expr_id)
+            if not expr_stack:
+                raise ParseError(d.line_no, 'no expression to end')
+            start_event = expr_stack.pop()
+            if start_event.expr_id != done_event.expr_id:
+                raise ParseError(
+                    d.line_no,
+                    'mismatching ExprStart/ExprDone events: {} and {}'.format(
                         start_event, done_event
                     )
                 )
-                start_event._done_event = done_event
-                scope_stack[-1].events.append(done_event)
-
-            elif d.is_a(MemoizationReturnDirective):
-                if (not scope_stack or
-                        not isinstance(scope_stack[-1], MemoizationLookup)):
-                    raise ParseError(
-                        line_no,
-                        'memoization-result directive must appear inside a'
-                        ' memoization-lookup scope'
-                    )
-                scope_stack[-1].events.append(d)
-
-            elif d.is_a(PropertyBodyStart):
-                if not scope_stack:
-                    raise ParseError(
-                        line_no,
-                        'property-body-start directive must appear inside a'
-                        ' property'
-                    )
-                scope_stack[0].body_start = d.line_no
-
-            else:
-                raise NotImplementedError('Unknown directive: {}'.format(d))
+            start_event._done_event = done_event
+            scope_stack[-1].events.append(done_event)
+
+        elif d.is_a(MemoizationReturnDirective):
+            if (not scope_stack or
+                    not isinstance(scope_stack[-1], MemoizationLookup)):
+                raise ParseError(
+                    d.line_no,
+                    'memoization-result directive must appear inside a'
+                    ' memoization-lookup scope'
+                )
+            scope_stack[-1].events.append(d)
+
+        elif d.is_a(PropertyBodyStart):
+            if not scope_stack:
+                raise ParseError(
+                    d.line_no,
+                    'property-body-start directive must appear inside a'
+                    ' property'
+                )
+            scope_stack[0].body_start = d.line_no
 
-        if scope_stack:
-            raise ParseError(line_no, 'end of scope expected before end of'
-                                      ' file')
+        else:
+            raise NotImplementedError('Unknown directive: {}'.format(d))
 
     def lookup_property(self, line_no):
         """
@@ -269,6 +400,43 @@ class DebugInfo:
         """
         return self.properties_dict[name]
 
+    def get_property_by_lower_name(self, name):
+        """
+        Fetch the property whose name is `name`, case insensitively. Return
+        None if not found.
+
+        :param str name: Name of the property to fetch.
+        :rtype: Property|None
+        """
+        return self.properties_by_lower_name.get(name.lower())
+
+    def lookup_expr_starts(self, dsl_sloc):
+        """
+        Look for all expression starts whose DSL location matches `dsl_sloc`
+        (see DSLLocation.matches). Results are sorted in source order.
+
+        :type dsl_sloc: DSLLocation
+        :rtype: list[(Property, ExprStart)]
+        """
+        # The index is complete only once the events of all properties are
+        # parsed.
+        for prop in self.properties:
+            prop.parse_events()
+
+        # All candidates have the same line number as `dsl_sloc`, so only the
+        # filename part of DSLLocation.matches is left to check.
+        filename = dsl_sloc.filename
+        result = [(prop, e)
+                  for prop, e in self.expr_starts_by_dsl_line.get(
+                      dsl_sloc.line_no, []
+                  )
+                  if e.dsl_sloc.filename.endswith(filename)]
+
+        # The index follows the order in which properties were parsed: sort
+        # results so that users always get matches in the same order.
+        result.sort(key=lambda m: m[1].line_no)
+        return result
+
 
 class DSLLocation:
     """
@@ -280,11 +448,14 @@ class DSLLocation:
         self.line_no = line_no
 
     @classmethod
+    @lru_cache(maxsize=None)
     def parse(cls, dsl_sloc):
         """
         If `dsl_sloc` is "None", return None. Otherwise, create a DSLLocation
         instance out of a string of the form "filename:line_no".
 
+        Results are memoized, so callers must not mutate returned instances.
+
         :type dsl_sloc: str
         :rtype: DSLLocation
         """
@@ -301,7 +472,8 @@ class DSLLocation:
         except ValueError:
             raise ValueError('Invalid line number: {}'.format(line_no))
 
-        return cls(filename, line_no)
+        # The same DSL files appear in many locations: share filename strings
+        return cls(sys.intern(filename), line_no)
 
     def matches(self, other):
         """
@@ -368,24 +540,30 @@ class Scope(BaseEvent):
         :rtype: iter[BaseEvent]
         """
 
-        def predicate(e):
-            if filter is None:
+        if filter is None:
+            def predicate(e):
                 return True
-            elif inspect.isclass(filter):
+        elif inspect.isclass(filter):
+            def predicate(e):
                 return isinstance(e, filter)
-            else:
-                return filter(e)
-
-        for e in self.events:
-            if isinstance(e, Scope):
+        else:
+            predicate = filter
+
+        # Walk through sub-scopes with an explicit stack of event iterators
+        # rather than with nested generators, so that yielding an event does
+        # not go through one generator per nesting level.
+        stack = [iter(self.events)]
+        while stack:
+            for e in stack[-1]:
                 if predicate(e):
                     yield e
-                if recursive:
-                    for sub_e in e.iter_events(filter=filter):
-                        yield sub_e
+                if recursive and isinstance(e, Scope):
+                    # Process the events of this sub-scope before resuming
+                    # the iteration on the events that follow it.
+                    stack.append(iter(e.events))
+                    break
             else:
-                if predicate(e):
-                    yield e
+                stack.pop()
 
     def __repr__(self):
         return '<{}{} {}>'.format(
@@ -418,12 +596,63 @@ class PropertyCall:
 
 
 class Property(Scope):
-    def __init__(self, line_range, name, dsl_sloc, is_dispatcher):
+    def __init__(self, line_range, name, dsl_sloc, is_dispatcher,
+                 debug_info):
         super().__init__(line_range, name)
         self.name = name
         self.dsl_sloc = dsl_sloc
         self.is_dispatcher = is_dispatcher
 
+        self.body_start = None
+        """
+        Line number where to put breakpoints for the beginning of this
+        property, or None if this property has no code.
+
+        :type: int|None
+        """
+
+        self.debug_info = debug_info
+        """
+        :type: DebugInfo
+
+        Debug info that contains this property.
+        """
+
+        self._directives = []
+        """
+        :type: list[(int, str)]|None
+
+        Line number and text for the directives inside this property that are
+        yet to be parsed, or None if they have been parsed already.
+        """
+
+        self.parse_error = None
+        """
+        :type: str|None
+
+        If parsing the directives inside this property failed, error message
+        for it. This property has no events in that case.
+        """
+
+    @property
+    def events(self):
+        self.parse_events()
+        return self._events
+
+    @events.setter
+    def events(self, events):
+        self._events = events
+
+    def parse_events(self):
+        """
+        Parse the directives inside this property to create its events, if
+        not done already.
+        """
+        if self._directives is not None:
+            directives = self._directives
+            self._directives = None
+            self.debug_info._parse_property_events(self, directives)
+
     @property
     def memoization_lookup(self):
         """
@@ -464,9 +693,13 @@ class Bind(Event):
         self.dsl_name = dsl_name
         self.gen_name = gen_name
 
+        # Switching to lower-case is required since GDB ignores case
+        # insentivity for Ada from the Python API.
+        self.gen_lower_name = gen_name.lower()
+
     def apply_on_state(self, scope_state):
         scope_state.bindings.append(
-            Binding(self.dsl_name, self.gen_name)
+            Binding(self.dsl_name, self.gen_name, self.gen_lower_name)
         )
 
     def __repr__(self):
@@ -481,6 +714,9 @@ class ExprStart(Event):
         self.result_var = result_var
         self.dsl_sloc = None if dsl_sloc == 'None' else dsl_sloc
 
+        # See Bind.__init__ for lower-casing
+        self.result_lower_var = result_var.lower()
+
         self.sub_expr_start = []
         """
         :type: list[ExprStart]
@@ -523,6 +759,7 @@ class ExprStart(Event):
         if scope_state.state.started_expressions:
             scope_state.state.started_expressions[-1].append_sub_expr(expr)
         scope_state.state.started_expressions.append(expr)
+        scope_state.started_expressions.append(expr)
 
     def __repr__(self):
         return '<ExprStart {}, line {}>'.format(self.expr_id, self.line_no)
@@ -541,6 +778,8 @@ class ExprDone(Event):
             'Expressions are not properly nested: {} is done before {}'
             ' is'.format(expr, pop)
         )
+        scope_state.started_expressions.pop()
+        scope_state.done_expressions.append(expr)
         expr.set_done(self.line_no)
 
     def __repr__(self):
@@ -600,7 +839,15 @@ class Directive:
             subcls = cls.name_to_cls[name]
         except KeyError:
             raise ParseError(line_no, 'invalid directive: {}'.format(name))
-        return subcls.parse(line_no, args)
+
+        # Directive parsers raise ValueError or AssertionError for invalid
+        # arguments (wrong number of arguments, invalid DSL locations, ...).
+        try:
+            return subcls.parse(line_no, args)
+        except (ValueError, AssertionError) as exc:
+            raise ParseError(line_no, 'invalid {} directive: {}'.format(
+                name, str(exc) or 'invalid arguments'
+            ))
 
 
 class PropertyStart(Directive):
@@ -669,7 +916,8 @@ class BindDirective(Directive):
     @classmethod
     def parse(cls, line_no, args):
         dsl_name, gen_name = args
-        return cls(dsl_name, gen_name, line_no)
+        # DSL names are often reused (Self, Entity, ...): share their strings
+        return cls(sys.intern(dsl_name), gen_name, line_no)
 
 
 class End(Directive):
@@ -689,8 +937,10 @@ class ExprStartDirective(Directive):
     @classmethod
     def parse(cls, line_no, args):
         expr_id, expr_repr, result_var, dsl_sloc = args
-        return cls(expr_id, expr_repr, result_var, DSLLocation.parse(dsl_sloc),
-                   line_no)
+        # Share strings for expression images, as the same expressions often
+        # appear in several properties.
+        return cls(expr_id, sys.intern(expr_repr), result_var,
+                   DSLLocation.parse(dsl_sloc), line_no)
 
 
 class ExprDoneDirective(Directive):
@@ -108,9 +108,8 @@ class State:
                               langkit.gdb.state.ExpressionEvaluation)
         """
         for scope_state in reversed(self.scopes):
-            for e in reversed(scope_state.expressions.values()):
-                if e.is_started:
-                    return scope_state, e
+            if scope_state.started_expressions:
+                return scope_state, scope_state.started_expressions[-1]
         return (None, None)
 
     def lookup_expr(self, expr_id):
@@ -213,6 +212,21 @@ class ScopeState:
         this state, indexed by unique ids.
         """
 
+        self.started_expressions = []
+        """
+        :type: list[ExpressionEvaluation]
+
+        Stack of expressions in this scope that are being evaluated.
+        """
+
+        self.done_expressions = []
+        """
+        :type: list[ExpressionEvaluation]
+
+        Expressions in this scope whose evaluation is completed, in the order
+        in which evaluation completed.
+        """
+
         self.called_property = None
         """
         Property that is currently being called, if any.
@@ -228,21 +242,12 @@ class ScopeState:
 
         :rtype: (list[ExpressionEvaluation], ExpressionEvaluation)
         """
-
-        done_exprs = []
-        last_started = None
-        for e in self.expressions.values():
-            if e.is_started:
-                last_started = e
-            elif e.is_done:
-                done_exprs.append(e)
-
-        # Sort expressions whose evaluation is completed by "done location"
-        # so that users see them in the order they saw evaluation
-        # happening.
-        done_exprs.sort(key=lambda e: e.done_at_line)
-
-        return done_exprs, last_started
+        # Events are applied in source order, so expressions whose evaluation
+        # is completed are already sorted by "done location": users see them
+        # in the order they saw evaluation happening.
+        return (list(self.done_expressions),
+                self.started_expressions[-1]
+                if self.started_expressions else None)
 
 
 class Binding:
@@ -251,7 +256,7 @@ class Binding:
     generated code.
     """
 
-    def __init__(self, dsl_name, gen_name):
+    def __init__(self, dsl_name, gen_name, gen_lower_name):
         self.dsl_name = dsl_name
         """
         :type: str
@@ -264,6 +269,13 @@ class Binding:
         Name of the variable in the Ada generated code.
         """
 
+        self.gen_lower_name = gen_lower_name
+        """
+        :type: str
+        Lower-case name of the variable in the Ada generated code, to read it
+        from GDB.
+        """
+
 
 class ExpressionEvaluation:
     """
@@ -303,6 +315,10 @@ class ExpressionEvaluation:
     def result_var(self):
         return self.start_event.result_var
 
+    @property
+    def result_lower_var(self):
+        return self.start_event.result_lower_var
+
     @property
     def dsl_sloc(self):
         return self.start_event.dsl_sloc
@@ -332,17 +348,18 @@ class ExpressionEvaluation:
         self.sub_exprs.append(expr)
         expr.parent_expr = self
 
-    def read(self, frame):
+    def read(self, context, frame):
         """
         Read the value of this expression in the given GDB frame.
 
         This is valid iff this expression is done.
 
+        :type context: langkit.gdb.context.Context
         :type frame: gdb.Frame
         :rtype: gdb.Value
         """
         assert self.is_done
-        return frame.read_var(self.result_var.lower())
+        return context.read_var(frame, self.result_lower_var)
 
     def __repr__(self):
         return '<ExpressionEvaluation {}, {}>'.format(self.expr_id,
@@ -9,12 +9,33 @@ class TDH:
     def __init__(self, value):
         self.value = value
 
-    def _vector_item(self, vector, index):
-        last = int(vector['size'])
+        self._vectors = {}
+        """
+        Cache for the vectors in this TDH, indexed by field name. Values are
+        tuples for the vector size and the dereferenced vector array.
+
+        :type: dict[str, (int, gdb.Value)]
+        """
+
+    def _vector(self, name):
+        """
+        Return the size and the dereferenced array for the vector in the
+        `name` field of this TDH. Both are read from the inferior only once.
+
+        :rtype: (int, gdb.Value)
+        """
+        try:
+            return self._vectors[name]
+        except KeyError:
+            vector = self.value[name]
+            result = (int(vector['size']), vector['e'].dereference())
+            self._vectors[name] = result
+            return result
+
+    def _vector_item(self, name, index):
+        last, array = self._vector(name)
         if index < 1 or last < index:
             raise gdb.error('Out of bounds index')
-
-        array = vector['e'].dereference()
         return array[index]
 
     def get(self, token_no, trivia_no):
@@ -34,7 +55,7 @@ class TDH:
 
         :rtype: Token
         """
-        return Token(self, self._vector_item(self.value['tokens'], token_no),
+        return Token(self, self._vector_item('tokens', token_no),
                      token_no, 0)
 
     def trivia(self, token_no, trivia_no):
@@ -44,7 +65,7 @@ class TDH:
         :rtype: Token
         """
         return Token(self,
-                     self._vector_item(self.value['trivias'], trivia_no)['t'],
+                     self._vector_item('trivias', trivia_no)['t'],
                      token_no, trivia_no)
 
 
@@ -53,6 +74,8 @@ class Token:
     Helper to deal with tokens.
     """
 
+    __slots__ = ('tdh', 'value', 'token_no', 'trivia_no')
+
     def __init__(self, tdh, value, token_no, trivia_no):
         self.tdh = tdh
         self.value = value
@@ -96,6 +119,8 @@ class Token:
 
 
 class Sloc:
+    __slots__ = ('line', 'column')
+
     def __init__(self, line, column):
         self.line = line
         self.column = column
@@ -105,11 +130,27 @@ class Sloc:
 
 
 class SlocRange:
+    """
+    Helper to deal with source location ranges.
+
+    Start and end source locations are read from the inferior only when
+    accessed.
+    """
+
+    __slots__ = ('value', )
+
     def __init__(self, value):
-        self.start = Sloc(int(value['start_line']),
-                          int(value['start_column']))
-        self.end = Sloc(int(value['end_line']),
-                        int(value['end_column']))
+        self.value = value
+
+    @property
+    def start(self):
+        return Sloc(int(self.value['start_line']),
+                    int(self.value['start_column']))
+
+    @property
+    def end(self):
+        return Sloc(int(self.value['end_line']),
+                    int(self.value['end_column']))
 
     def __repr__(self):
         return '{}-{}'.format(self.start, self.end)